@@ -1,22 +1,230 @@
 #!/usr/bin/env python3
 
+import argparse
 import os
 import subprocess
 import sys
-from datetime import datetime
-import pytz
-from typing import List, Optional, Tuple
-from collections import defaultdict
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from collections import Counter, defaultdict
+from operator import itemgetter
+from zoneinfo import ZoneInfo
 
-def get_commit_log(repo_path: str) -> Optional[List[Tuple[str, datetime, str]]]:
+# ASCII unit/record separators never appear in emails, dates or subjects,
+# so fields and records can be split unambiguously
+FIELD_SEP = '\x1f'
+RECORD_SEP = '\x1e'
+# %ct: committer date as a unix timestamp, converted to PST here rather than by git
+LOG_FORMAT = "--pretty=format:%ce%x1f%ct%x1f%s%x1e"
+
+PST_TZ_NAME = 'America/Los_Angeles'
+PST = ZoneInfo(PST_TZ_NAME)
+
+# 'MM:SS' for every second of an hour
+_MINUTE_SECOND = [f"{minute:02d}:{second:02d}" for minute in range(60) for second in range(60)]
+
+@lru_cache(maxsize=None)
+def _pst_hour(utc_hour: int) -> Tuple[str, str]:
+    """Return the ('YYYY-MM-DDTHH:', '-08:00') halves of the PST ISO string for a UTC hour."""
+    iso = datetime.fromtimestamp(utc_hour * 3600, PST).isoformat()
+    return iso[:14], iso[19:]
+
+def pst_isoformat(epoch: int) -> str:
+    """
+    Format a unix timestamp as a PST ISO-8601 string, e.g. '2024-01-31T09:15:00-08:00'.
+    
+    America/Los_Angeles only changes offset on whole UTC hours, so the zone lookup and the
+    date/hour formatting are memoized per hour; only the minutes and seconds vary per commit.
+    
+    Args:
+        epoch (int): Unix timestamp
+    """
+    prefix, suffix = _pst_hour(epoch // 3600)
+    return prefix + _MINUTE_SECOND[epoch % 3600] + suffix
+
+def iter_records(stream, sep: str = RECORD_SEP, chunk_size: int = 1 << 16):
+    """
+    Yield sep-terminated records from a text stream without reading it all into memory.
+    
+    Args:
+        stream: Text stream to read from
+        sep (str): Single-character record terminator
+        chunk_size (int): Number of characters to read at a time
+    """
+    pending = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        records = (pending + chunk).split(sep)
+        pending = records.pop()
+        yield from records
+    if pending:
+        yield pending
+
+class GitError(Exception):
+    """Raised when the commit history cannot be read; the message is git's error."""
+
+@contextmanager
+def open_git_log(git_args: List[str]):
+    """
+    Run git log and yield its stdout as a text stream.
+    
+    stderr is drained on a background thread so a chatty git cannot block on a full pipe.
+    If the caller raises, or leaves the block before reading to EOF, git is killed; otherwise
+    a non-zero exit is raised as GitError carrying git's stderr.
+    
+    Args:
+        git_args (List[str]): Full git log command line
     """
-    Get the commit log with committer emails, dates, and titles from the given git repository path in PST.
+    # Include commit title in the log; stream it so parsing overlaps with git
+    with subprocess.Popen(
+        git_args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,         # Python 3.7+ preferred over universal_newlines
+        encoding='utf-8',  # explicitly specify UTF-8 decoding
+        bufsize=1 << 20
+    ) as proc:
+        stderr_chunks = []
+        drain = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+        drain.start()
+        try:
+            yield proc.stdout
+            # Output left unread means git may be blocked on a full pipe and would never exit
+            abandoned = bool(proc.stdout.read(1))
+            if abandoned:
+                proc.kill()
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            drain.join()
+        if not abandoned and proc.wait() != 0:
+            raise GitError(''.join(stderr_chunks))
+
+def parse_records(stream):
+    """
+    Parse FIELD_SEP/RECORD_SEP delimited git log records from a stream.
+    
+    Args:
+        stream: Text stream of records formatted with LOG_FORMAT
+        
+    Yields:
+        Tuple[str, int, str]: (email, commit timestamp, title) for each well-formed record
+    """
+    # Runs once per commit: bind module globals to locals to skip repeated dict lookups
+    _intern = sys.intern
+    field_sep = FIELD_SEP
+    for record in iter_records(stream):
+        # git separates entries with a newline after each record terminator
+        record = record.lstrip('\n')
+        if not record:
+            continue
+        try:
+            # Two find() scans and slices instead of split(): no per-record list allocation
+            i = record.find(field_sep)
+            j = record.find(field_sep, i + 1)
+            if i < 0 or j < 0:
+                raise ValueError("expected email, timestamp and title fields")
+            # git emits %ce and %s without surrounding whitespace, so no strip() needed.
+            # Interning collapses the few distinct emails to shared objects, so grouping
+            # by email hashes and compares by identity instead of building new strings
+            yield _intern(record[:i]), int(record[i + 1:j]), record[j + 1:]
+        except ValueError as e:
+            print(f"Warning: Could not parse record {record!r}: {str(e)}")
+
+def group_commits(commits):
+    """
+    Convert commit timestamps to PST, group the commits by email and count them per day.
     
     Args:
+        commits: Iterable of (email, timestamp, title) tuples, e.g. from parse_records
+        
+    Returns:
+        Tuple of (parsed_commits, commits_by_email, commits_per_day)
+    """
+    parsed_commits = []
+    commits_by_email = defaultdict(list)
+    _append = parsed_commits.append
+    for email, epoch, title in commits:
+        commit_date = pst_isoformat(epoch)
+        _append((email, commit_date, title))
+        # Group by email in the same pass instead of sorting the whole history
+        commits_by_email[email].append((epoch, commit_date, title))
+
+    # Sort each (much smaller) per-email bucket chronologically, then drop the timestamp.
+    # Sorting on the timestamp rather than the PST string keeps the repeated fall-back
+    # hour in order (01:30 PDT happens before 01:15 PST)
+    by_epoch = itemgetter(0)
+    for email, bucket in commits_by_email.items():
+        bucket.sort(key=by_epoch)
+        commits_by_email[email] = [(commit_date, title) for _, commit_date, title in bucket]
+
+    # Count commits per day; Counter tallies in C and keeps a single key object per day
+    commits_per_day = Counter(commit_date[:10] for _, commit_date, _ in parsed_commits)
+    return parsed_commits, commits_by_email, commits_per_day
+
+@dataclass
+class Stats:
+    """
+    Commit analytics for a repository. All dates are PST ISO-8601 strings.
+    
+    Attributes:
         repo_path (str): Path to the git repository
+        commits (List[Tuple[str, str, str]]): (email, commit_date, title) tuples
+        commits_by_email (Dict[str, List[Tuple[str, str]]]): (commit_date, title) per email, oldest first
+        commits_per_day (Dict[str, int]): Number of commits per 'YYYY-MM-DD' day
+        total_commits (int): Number of commits
+        num_weekday_commits (int): Number of commits made Monday to Friday
+        num_weekdays (int): Number of distinct Monday-to-Friday days with commits
+    """
+    repo_path: str
+    commits: List[Tuple[str, str, str]]
+    commits_by_email: Dict[str, List[Tuple[str, str]]]
+    commits_per_day: Dict[str, int]
+    total_commits: int
+    num_weekday_commits: int
+    num_weekdays: int
+
+    @property
+    def total_committers(self) -> int:
+        return len(self.commits_by_email)
+
+    @property
+    def avg_per_day(self) -> float:
+        num_days = len(self.commits_per_day)
+        return self.total_commits / num_days if num_days else 0
+
+    @property
+    def avg_per_weekday(self) -> float:
+        return self.num_weekday_commits / self.num_weekdays if self.num_weekdays else 0
+
+def collect_stats(
+    repo_path: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    author: Optional[str] = None,
+    no_merges: bool = False,
+    build_graph: bool = False,
+) -> Optional[Stats]:
+    """
+    Collect commit analytics (committer emails, dates and titles in PST) for the given git repository path.
+    
+    Args:
+        repo_path (str): Path to the git repository
+        since (Optional[str]): Only include commits more recent than this date (passed to git log --since)
+        until (Optional[str]): Only include commits older than this date (passed to git log --until)
+        author (Optional[str]): Only include commits whose author matches this pattern (git log --author)
+        no_merges (bool): Exclude merge commits (git log --no-merges)
+        build_graph (bool): Write a commit-graph before walking history to speed up git log
         
     Returns:
-        Optional[List[Tuple[str, datetime, str]]]: List of (email, commit_date, title) tuples
+        Optional[Stats]: The collected statistics, or None if the log could not be read
     """
     
     # Validate repository path
@@ -28,104 +236,165 @@ def get_commit_log(repo_path: str) -> Optional[List[Tuple[str, datetime, str]]]:
         print(f"Error: '{repo_path}' is not a valid Git repository.")
         return None
 
+    # Filter at the git layer so only the requested commits are walked and parsed
+    git_args = [
+        "git", "-C", repo_path, "-c", "core.commitGraph=true",
+        "log", LOG_FORMAT
+    ]
+    if since:
+        git_args.append(f"--since={since}")
+    if until:
+        git_args.append(f"--until={until}")
+    if author:
+        git_args.append(f"--author={author}")
+    if no_merges:
+        git_args.append("--no-merges")
+
     try:
-        # Include commit title in the log
-        log_output = subprocess.check_output(
-            ["git", "-C", repo_path, "log", "--pretty=format:%ce|%cd|%s", "--date=iso-strict"],
-            stderr=subprocess.STDOUT,
-            text=True,         # Python 3.7+ preferred over universal_newlines
-            encoding='utf-8'   # explicitly specify UTF-8 decoding
-        )
+        if build_graph:
+            # Best effort: a missing or stale commit-graph only makes git log slower
+            subprocess.run(
+                ["git", "-C", repo_path, "commit-graph", "write", "--reachable", "--no-progress"],
+                check=False,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+
+        with open_git_log(git_args) as stream:
+            parsed_commits, commits_by_email, commits_per_day = group_commits(parse_records(stream))
 
-        
-        pst = pytz.timezone('America/Los_Angeles')
-        
-        parsed_commits = []
-        for line in log_output.splitlines():
-            if not line.strip():
-                continue
-            try:
-                email, date_str, title = line.split('|', 2)
-                utc_time = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                pst_time = utc_time.astimezone(pst)
-                parsed_commits.append((email.strip(), pst_time, title.strip()))
-            except (ValueError, IndexError) as e:
-                print(f"Warning: Could not parse line '{line}': {str(e)}")
-        
         if not parsed_commits:
             print(f"Warning: No valid commits found in repository '{repo_path}'")
             return None
 
-        # Sort by email then date
-        parsed_commits.sort(key=lambda x: (x[0], x[1]))
-
-        # Group commits by email
-        commits_by_email = defaultdict(list)
-        for email, commit_date, title in parsed_commits:
-            commits_by_email[email].append((commit_date, title))
-
-        # Count commits per day
-        commits_per_day = defaultdict(int)
-        for _, commit_date, _ in parsed_commits:
-            day = commit_date.strftime('%Y-%m-%d')
-            commits_per_day[day] += 1
-
-        # Display commits grouped by email
-        print(f"\nCommits grouped by committer email (PST) for repository at '{repo_path}':")
-        print("=" * 80)
-        
-        total_commits = 0
-        for email in sorted(commits_by_email.keys()):
-            commits = commits_by_email[email]
-            print(f"\n📧 {email} ({len(commits)} commits):")
-            print("-" * 60)
-            for pst_time, title in commits:
-                print(f"  {pst_time.strftime('%A, %Y-%m-%d %I:%M:%S %p %Z')} — {title}")
-            total_commits += len(commits)
-
-        print("=" * 80)
-        print(f"Total commits: {total_commits}")
-        print(f"Total committers: {len(commits_by_email)}")
-
-        print("\nCommits per day:")
-        for day in sorted(commits_per_day.keys()):
-            print(f"  {day}: {commits_per_day[day]} commits")
-
-        # === Average calculations ===
-        num_days = len(commits_per_day)
-        total_commits = sum(commits_per_day.values())
-
-        # Count weekdays only (Mon–Fri)
-        weekday_days = [
-            date for date in commits_per_day.keys()
-            if datetime.strptime(date, "%Y-%m-%d").weekday() < 5
-        ]
-        num_weekdays = len(weekday_days)
-
-        avg_per_day = total_commits / num_days if num_days else 0
-        avg_per_weekday = total_commits / num_weekdays if num_weekdays else 0
-
-        print(f"Commit Averages:")
-        print(f"  Average commits per day: {avg_per_day:.2f}")
-        print(f"  Average commits per weekday (no weekends): {avg_per_weekday:.2f}")
+        # Tally weekday (Mon–Fri) commits and days in a single pass over the distinct days;
+        # day keys are fixed-width, so slice instead of strptime
+        num_weekday_commits = 0
+        num_weekdays = 0
+        for day, count in commits_per_day.items():
+            if date(int(day[:4]), int(day[5:7]), int(day[8:10])).weekday() < 5:
+                num_weekday_commits += count
+                num_weekdays += 1
 
-        
-        return parsed_commits
+        return Stats(
+            repo_path=repo_path,
+            commits=parsed_commits,
+            commits_by_email=commits_by_email,
+            commits_per_day=commits_per_day,
+            total_commits=len(parsed_commits),
+            num_weekday_commits=num_weekday_commits,
+            num_weekdays=num_weekdays,
+        )
 
-    except subprocess.CalledProcessError as e:
-        print(f"Error running git command: {e.output}")
+    except GitError as e:
+        print(f"Error running git command: {e}")
         return None
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         return None
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 git_analytics.py <path_to_git_repo>")
-        sys.exit(1)
+def render(stats: Stats) -> None:
+    """
+    Print the commit report for the collected statistics.
+    
+    Args:
+        stats (Stats): Statistics returned by collect_stats
+    """
+    # Build the whole report and emit it with a single write instead of per-line print()
+    out = []
+    out_append = out.append
+    time_format = ' %I:%M:%S %p %Z'
+    # '%A, %Y-%m-%d' only changes per calendar day, so format it once per PST day
+    day_prefix_cache = {}
+    fromisoformat = datetime.fromisoformat
+
+    # Display commits grouped by email
+    out_append(f"\nCommits grouped by committer email (PST) for repository at '{stats.repo_path}':")
+    out_append("=" * 80)
+    
+    for email in sorted(stats.commits_by_email.keys()):
+        commits = stats.commits_by_email[email]
+        out_append(f"\n📧 {email} ({len(commits)} commits):")
+        out_append("-" * 60)
+        for commit_date, title in commits:
+            pst_time = fromisoformat(commit_date).astimezone(PST)
+            day = commit_date[:10]
+            day_prefix = day_prefix_cache.get(day)
+            if day_prefix is None:
+                # Format from the key itself so the cached prefix always matches its key
+                day_prefix = day_prefix_cache[day] = date.fromisoformat(day).strftime('%A, %Y-%m-%d')
+            out_append(f"  {day_prefix}{pst_time.strftime(time_format)} — {title}")
+
+    out_append("=" * 80)
+    out_append(f"Total commits: {stats.total_commits}")
+    out_append(f"Total committers: {stats.total_committers}")
+
+    out_append("\nCommits per day:")
+    for day in sorted(stats.commits_per_day.keys()):
+        out_append(f"  {day}: {stats.commits_per_day[day]} commits")
+
+    out_append(f"Commit Averages:")
+    out_append(f"  Average commits per day: {stats.avg_per_day:.2f}")
+    out_append(f"  Average commits per weekday (no weekends): {stats.avg_per_weekday:.2f}")
+
+    out_append("")
+    payload = "\n".join(out)
+    buffer = getattr(sys.stdout, 'buffer', None)
+    if buffer is None:
+        # stdout replaced by a text-only stream (e.g. contextlib.redirect_stdout)
+        sys.stdout.write(payload)
+        return
+    # Encode once and hand the bytes straight to the binary buffer, skipping TextIOWrapper;
+    # flush first so earlier warnings stay ahead of the report
+    sys.stdout.flush()
+    # Honour the stream's error handler too (e.g. PYTHONIOENCODING=ascii:replace, or
+    # surrogateescape under a C/POSIX locale), as print() would
+    buffer.write(payload.encode(sys.stdout.encoding or 'utf-8', sys.stdout.errors or 'strict'))
+    buffer.flush()
+
+def get_commit_log(repo_path: str, **options) -> Optional[List[Tuple[str, str, str]]]:
+    """
+    Collect and print the commit report for the given git repository path.
+    
+    Args:
+        repo_path (str): Path to the git repository
+        **options: Filters accepted by collect_stats
         
-    repo_path = sys.argv[1]
-    get_commit_log(repo_path)
+    Returns:
+        Optional[List[Tuple[str, str, str]]]: List of (email, commit_date, title) tuples, where
+        commit_date is an ISO-8601 string in PST (e.g. '2024-01-31T09:15:00-08:00')
+    """
+    stats = collect_stats(repo_path, **options)
+    if stats is None:
+        return None
+    render(stats)
+    return stats.commits
+
+def main():
+    parser = argparse.ArgumentParser(description="Show commit analytics for a git repository (PST).")
+    parser.add_argument("repo_path", help="Path to the git repository")
+    parser.add_argument("--since", help="Only include commits more recent than this date (e.g. 2024-01-01)")
+    parser.add_argument("--until", help="Only include commits older than this date")
+    parser.add_argument("--author", help="Only include commits whose author matches this pattern")
+    parser.add_argument("--no-merges", action="store_true", help="Exclude merge commits")
+    parser.add_argument("--build-graph", action="store_true",
+                        help="Write a commit-graph first to speed up history traversal")
+    args = parser.parse_args()
+
+    stats = collect_stats(
+        args.repo_path,
+        since=args.since,
+        until=args.until,
+        author=args.author,
+        no_merges=args.no_merges,
+        build_graph=args.build_graph,
+    )
+    if stats is not None:
+        try:
+            render(stats)
+        except Exception as e:
+            # Reported like the errors collect_stats catches, as when printing lived in its try
+            print(f"Unexpected error: {str(e)}")
 
 if __name__ == "__main__":
     main()
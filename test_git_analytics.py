@@ -0,0 +1,87 @@
+import io
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from git_analytics import collect_stats, open_git_log, render
+
+# (committer email, unix timestamp, subject)
+COMMITS = [
+    ("bob@example.com", 1704729600, "Monday commit"),                       # 2024-01-08 08:00 PST
+    ("alice@example.com", 1704906000, "Wednesday commit"),                  # 2024-01-10 09:00 PST
+    ("bob@example.com", 1705161600, "Weekend | pipe in subject"),           # 2024-01-13 08:00 PST (Saturday)
+    ("alice@example.com", 1730622600, "Before fall-back (01:30 PDT)"),     # 2024-11-03 01:30 PDT
+    ("alice@example.com", 1730625300, "After fall-back (01:15 PST)"),      # 2024-11-03 01:15 PST
+]
+
+
+def _git(repo, *args, env=None):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, env=env)
+
+
+@pytest.fixture(scope="module")
+def repo(tmp_path_factory):
+    path = tmp_path_factory.mktemp("repo")
+    _git(path, "init", "-q")
+    for email, epoch, subject in COMMITS:
+        env = dict(
+            os.environ,
+            GIT_AUTHOR_NAME="Test", GIT_AUTHOR_EMAIL=email, GIT_AUTHOR_DATE=f"@{epoch} +0000",
+            GIT_COMMITTER_NAME="Test", GIT_COMMITTER_EMAIL=email, GIT_COMMITTER_DATE=f"@{epoch} +0000",
+        )
+        _git(path, "commit", "-q", "--allow-empty", "-m", subject, env=env)
+    return str(path)
+
+
+def test_collect_stats(repo):
+    stats = collect_stats(repo)
+
+    assert stats.total_commits == 5
+    assert stats.total_committers == 2
+    assert stats.commits_by_email["bob@example.com"] == [
+        ("2024-01-08T08:00:00-08:00", "Monday commit"),
+        ("2024-01-13T08:00:00-08:00", "Weekend | pipe in subject"),
+    ]
+    # The repeated 01:xx hour is ordered by instant, not by wall-clock time
+    assert stats.commits_by_email["alice@example.com"][1:] == [
+        ("2024-11-03T01:30:00-07:00", "Before fall-back (01:30 PDT)"),
+        ("2024-11-03T01:15:00-08:00", "After fall-back (01:15 PST)"),
+    ]
+    assert stats.commits_per_day == {"2024-01-08": 1, "2024-01-10": 1, "2024-01-13": 1, "2024-11-03": 2}
+    # 2024-11-03 is a Sunday and 2024-01-13 a Saturday
+    assert stats.num_weekday_commits == 2
+    assert stats.num_weekdays == 2
+
+
+def test_collect_stats_ignores_git_timezone(repo, monkeypatch):
+    expected = collect_stats(repo)
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    assert collect_stats(repo) == expected
+
+
+def test_render_non_utf8_stdout(repo, monkeypatch):
+    raw = io.BytesIO()
+    monkeypatch.setattr(sys, "stdout", io.TextIOWrapper(raw, encoding="ascii", errors="replace"))
+    render(collect_stats(repo))
+
+    output = raw.getvalue().decode("ascii")
+    assert "? alice@example.com (3 commits):" in output
+    assert "Weekend | pipe in subject" in output
+    assert "Average commits per weekday (no weekends): 1.00" in output
+
+
+def test_open_git_log_stops_unread_output():
+    # Far more output than the pipe and read buffers hold, so the writer blocks until killed
+    args = [sys.executable, "-c", "import sys; sys.stdout.write('x' * (1 << 26))"]
+    done = threading.Event()
+
+    def read_prefix():
+        with open_git_log(args) as stream:
+            assert stream.read(10) == "x" * 10
+        done.set()
+
+    threading.Thread(target=read_prefix, daemon=True).start()
+    assert done.wait(timeout=30)